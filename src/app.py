@@ -5,10 +5,11 @@ A super simple FastAPI application that allows students to view and sign up
 for extracurricular activities at Mergington High School.
 """
 
-from fastapi import FastAPI, HTTPException
+from fastapi import Body, FastAPI, HTTPException
 from fastapi.staticfiles import StaticFiles
 from fastapi.responses import RedirectResponse
 import os
+import threading
 from pathlib import Path
 
 app = FastAPI(title="Mergington High School API",
@@ -19,61 +20,64 @@ current_dir = Path(__file__).parent
 app.mount("/static", StaticFiles(directory=os.path.join(Path(__file__).parent,
           "static")), name="static")
 
+# Guards the activity database, since sync endpoints run in a thread pool
+activities_lock = threading.Lock()
+
 # In-memory activity database
 activities = {
     "Chess Club": {
         "description": "Learn strategies and compete in chess tournaments",
         "schedule": "Fridays, 3:30 PM - 5:00 PM",
         "max_participants": 12,
-        "participants": ["michael@mergington.edu", "daniel@mergington.edu"]
+        "participants": {"michael@mergington.edu", "daniel@mergington.edu"}
     },
     "Programming Class": {
         "description": "Learn programming fundamentals and build software projects",
         "schedule": "Tuesdays and Thursdays, 3:30 PM - 4:30 PM",
         "max_participants": 20,
-        "participants": ["emma@mergington.edu", "sophia@mergington.edu"]
+        "participants": {"emma@mergington.edu", "sophia@mergington.edu"}
     },
     "Gym Class": {
         "description": "Physical education and sports activities",
         "schedule": "Mondays, Wednesdays, Fridays, 2:00 PM - 3:00 PM",
         "max_participants": 30,
-        "participants": ["john@mergington.edu", "olivia@mergington.edu"]
+        "participants": {"john@mergington.edu", "olivia@mergington.edu"}
     },
     "Basketball Team": {
         "description": "Practice basketball skills and compete in inter-school tournaments",
         "schedule": "Tuesdays and Thursdays, 4:00 PM - 5:30 PM",
         "max_participants": 15,
-        "participants": ["james@mergington.edu", "lucas@mergington.edu"]
+        "participants": {"james@mergington.edu", "lucas@mergington.edu"}
     },
     "Swimming Club": {
         "description": "Improve swimming techniques and participate in competitions",
         "schedule": "Mondays and Wednesdays, 3:30 PM - 5:00 PM",
         "max_participants": 20,
-        "participants": ["emily@mergington.edu", "noah@mergington.edu"]
+        "participants": {"emily@mergington.edu", "noah@mergington.edu"}
     },
     "Art Studio": {
         "description": "Explore various art mediums including painting, drawing, and sculpture",
         "schedule": "Wednesdays, 3:30 PM - 5:00 PM",
         "max_participants": 15,
-        "participants": ["ava@mergington.edu", "mia@mergington.edu"]
+        "participants": {"ava@mergington.edu", "mia@mergington.edu"}
     },
     "Drama Club": {
         "description": "Perform in plays, learn acting techniques, and stage production",
         "schedule": "Thursdays, 3:30 PM - 5:30 PM",
         "max_participants": 25,
-        "participants": ["liam@mergington.edu", "isabella@mergington.edu"]
+        "participants": {"liam@mergington.edu", "isabella@mergington.edu"}
     },
     "Debate Team": {
         "description": "Develop critical thinking and public speaking through competitive debates",
         "schedule": "Mondays, 3:30 PM - 5:00 PM",
         "max_participants": 16,
-        "participants": ["ethan@mergington.edu", "charlotte@mergington.edu"]
+        "participants": {"ethan@mergington.edu", "charlotte@mergington.edu"}
     },
     "Science Olympiad": {
         "description": "Compete in science competitions and conduct research projects",
         "schedule": "Fridays, 3:30 PM - 5:30 PM",
         "max_participants": 18,
-        "participants": ["mason@mergington.edu", "amelia@mergington.edu"]
+        "participants": {"mason@mergington.edu", "amelia@mergington.edu"}
     }
 }
 
@@ -85,7 +89,11 @@ def root():
 
 @app.get("/activities")
 def get_activities():
-    return activities
+    # Participants are stored as sets for fast lookups; serialize them as lists
+    return {
+        name: {**details, "participants": sorted(details["participants"])}
+        for name, details in activities.items()
+    }
 
 
 @app.post("/activities/{activity_name}/signup")
@@ -98,19 +106,47 @@ def signup_for_activity(activity_name: str, email: str):
     # Get the specific activity
     activity = activities[activity_name]
 
-    # Validate student is not already signed up
-    if email in activity["participants"]: 
-        raise HTTPException(status_code=400, detail="Student already signed up for this activity")
-    
-    # Validate max participants not exceeded
-    if len(activity["participants"]) >= activity["max_participants"]:
-        raise HTTPException(status_code=400, detail="Activity is full")
-
-    # Add student
-    activity["participants"].append(email)
+    with activities_lock:
+        # Validate student is not already signed up
+        if email in activity["participants"]: 
+            raise HTTPException(status_code=400, detail="Student already signed up for this activity")
+        
+        # Validate max participants not exceeded
+        if len(activity["participants"]) >= activity["max_participants"]:
+            raise HTTPException(status_code=400, detail="Activity is full")
+
+        # Add student
+        activity["participants"].add(email)
     return {"message": f"Signed up {email} for {activity_name}"}
 
 
+@app.post("/activities/{activity_name}/signup:batch")
+def batch_signup_for_activity(activity_name: str, emails: list[str] = Body(embed=True)):
+    """Sign up several students for an activity in a single request"""
+    # Validate activity exists
+    if activity_name not in activities:
+        raise HTTPException(status_code=404, detail="Activity not found")
+
+    # Get the specific activity
+    activity = activities[activity_name]
+    participants = activity["participants"]
+
+    succeeded = []
+    failed = []
+    with activities_lock:
+        for email in emails:
+            # Apply the same checks as a single signup, reporting per-email failures
+            if email in participants:
+                failed.append({"email": email, "reason": "Student already signed up for this activity"})
+            elif len(participants) >= activity["max_participants"]:
+                failed.append({"email": email, "reason": "Activity is full"})
+            else:
+                participants.add(email)
+                succeeded.append(email)
+
+    return {"succeeded": succeeded, "failed": failed}
+
+
 @app.delete("/activities/{activity_name}/unregister")
 def unregister_from_activity(activity_name: str, email: str):
     """Unregister a student from an activity"""
@@ -121,10 +157,11 @@ def unregister_from_activity(activity_name: str, email: str):
     # Get the specific activity
     activity = activities[activity_name]
 
-    # Validate student is signed up
-    if email not in activity["participants"]:
-        raise HTTPException(status_code=400, detail="Student not registered for this activity")
+    with activities_lock:
+        # Validate student is signed up
+        if email not in activity["participants"]:
+            raise HTTPException(status_code=400, detail="Student not registered for this activity")
 
-    # Remove student
-    activity["participants"].remove(email)
+        # Remove student
+        activity["participants"].discard(email)
     return {"message": f"Unregistered {email} from {activity_name}"}
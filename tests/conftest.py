@@ -1,6 +1,9 @@
 """
 Pytest configuration and fixtures for testing the FastAPI application.
 """
+import copy
+import httpx
+import orjson
 import pytest
 from fastapi.testclient import TestClient
 import sys
@@ -9,82 +12,63 @@ from pathlib import Path
 # Add src directory to path
 sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
 
-from app import app, activities
+from app import app, activities, signup_for_activity
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def client():
-    """Create a test client for the FastAPI app."""
+    """Create a single test client for the FastAPI app, shared by all tests."""
     return TestClient(app)
 
 
+@pytest.fixture(scope="session")
+def signup_handler():
+    """Expose the signup route handler for calling it without the HTTP layer."""
+    return signup_for_activity
+
+
+@pytest.fixture(scope="session")
+def rjson():
+    """Parse a response body with orjson instead of the stdlib json module."""
+    def parse(response):
+        return orjson.loads(response.content)
+    return parse
+
+
+@pytest.fixture
+def state():
+    """Expose the in-memory activities database for direct assertions."""
+    return activities
+
+
+@pytest.fixture(scope="session")
+def pristine_activities():
+    """Snapshot the pristine activities once; tests may read it but never modify it."""
+    return copy.deepcopy(activities)
+
+
+@pytest.fixture(scope="session")
+def anyio_backend():
+    """Run async tests on asyncio only."""
+    return "asyncio"
+
+
+@pytest.fixture
+async def async_client():
+    """Create an async client that talks to the FastAPI app in-process."""
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as ac:
+        yield ac
+
+
 @pytest.fixture(autouse=True)
-def reset_activities():
-    """Reset activities database before each test."""
-    # Store original state
-    original_activities = {
-        "Chess Club": {
-            "description": "Learn strategies and compete in chess tournaments",
-            "schedule": "Fridays, 3:30 PM - 5:00 PM",
-            "max_participants": 12,
-            "participants": ["michael@mergington.edu", "daniel@mergington.edu"]
-        },
-        "Programming Class": {
-            "description": "Learn programming fundamentals and build software projects",
-            "schedule": "Tuesdays and Thursdays, 3:30 PM - 4:30 PM",
-            "max_participants": 20,
-            "participants": ["emma@mergington.edu", "sophia@mergington.edu"]
-        },
-        "Gym Class": {
-            "description": "Physical education and sports activities",
-            "schedule": "Mondays, Wednesdays, Fridays, 2:00 PM - 3:00 PM",
-            "max_participants": 30,
-            "participants": ["john@mergington.edu", "olivia@mergington.edu"]
-        },
-        "Basketball Team": {
-            "description": "Practice basketball skills and compete in inter-school tournaments",
-            "schedule": "Tuesdays and Thursdays, 4:00 PM - 5:30 PM",
-            "max_participants": 15,
-            "participants": ["james@mergington.edu", "lucas@mergington.edu"]
-        },
-        "Swimming Club": {
-            "description": "Improve swimming techniques and participate in competitions",
-            "schedule": "Mondays and Wednesdays, 3:30 PM - 5:00 PM",
-            "max_participants": 20,
-            "participants": ["emily@mergington.edu", "noah@mergington.edu"]
-        },
-        "Art Studio": {
-            "description": "Explore various art mediums including painting, drawing, and sculpture",
-            "schedule": "Wednesdays, 3:30 PM - 5:00 PM",
-            "max_participants": 15,
-            "participants": ["ava@mergington.edu", "mia@mergington.edu"]
-        },
-        "Drama Club": {
-            "description": "Perform in plays, learn acting techniques, and stage production",
-            "schedule": "Thursdays, 3:30 PM - 5:30 PM",
-            "max_participants": 25,
-            "participants": ["liam@mergington.edu", "isabella@mergington.edu"]
-        },
-        "Debate Team": {
-            "description": "Develop critical thinking and public speaking through competitive debates",
-            "schedule": "Mondays, 3:30 PM - 5:00 PM",
-            "max_participants": 16,
-            "participants": ["ethan@mergington.edu", "charlotte@mergington.edu"]
-        },
-        "Science Olympiad": {
-            "description": "Compete in science competitions and conduct research projects",
-            "schedule": "Fridays, 3:30 PM - 5:30 PM",
-            "max_participants": 18,
-            "participants": ["mason@mergington.edu", "amelia@mergington.edu"]
-        }
-    }
-    
-    # Reset the activities to original state before each test
-    activities.clear()
-    activities.update(original_activities)
-    
+def reset_activities(request, pristine_activities):
+    """Reset activities database to its pristine state after each test."""
     yield
-    
-    # Cleanup after test (reset again)
+
+    # Tests marked no_reset never mutate state, so there is nothing to undo
+    if request.node.get_closest_marker("no_reset"):
+        return
+
     activities.clear()
-    activities.update(original_activities)
+    activities.update(copy.deepcopy(pristine_activities))
@@ -1,7 +1,12 @@
 """
 Tests for the Mergington High School API endpoints.
 """
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
 import pytest
+from fastapi import HTTPException
 
 
 class TestRootEndpoint:
@@ -17,12 +22,14 @@ class TestRootEndpoint:
 class TestActivitiesEndpoint:
     """Tests for the GET /activities endpoint."""
     
-    def test_get_activities_returns_all_activities(self, client):
+    pytestmark = pytest.mark.no_reset
+    
+    def test_get_activities_returns_all_activities(self, client, rjson):
         """Test that GET /activities returns all activities."""
         response = client.get("/activities")
         assert response.status_code == 200
         
-        data = response.json()
+        data = rjson(response)
         assert isinstance(data, dict)
         assert len(data) == 9  # We have 9 activities in the database
         
@@ -31,10 +38,10 @@ class TestActivitiesEndpoint:
         assert "Programming Class" in data
         assert "Basketball Team" in data
     
-    def test_activities_have_correct_structure(self, client):
+    def test_activities_have_correct_structure(self, client, rjson):
         """Test that each activity has the correct structure."""
         response = client.get("/activities")
-        data = response.json()
+        data = rjson(response)
         
         for activity_name, activity in data.items():
             assert "description" in activity
@@ -48,7 +55,7 @@ class TestActivitiesEndpoint:
 class TestSignupEndpoint:
     """Tests for the POST /activities/{activity_name}/signup endpoint."""
     
-    def test_signup_for_activity_success(self, client):
+    def test_signup_for_activity_success(self, client, state, rjson):
         """Test successful signup for an activity."""
         response = client.post(
             "/activities/Chess Club/signup",
@@ -56,24 +63,13 @@ class TestSignupEndpoint:
         )
         assert response.status_code == 200
         
-        data = response.json()
+        data = rjson(response)
         assert data["message"] == "Signed up newstudent@mergington.edu for Chess Club"
         
         # Verify the student was added
-        activities_response = client.get("/activities")
-        activities = activities_response.json()
-        assert "newstudent@mergington.edu" in activities["Chess Club"]["participants"]
-    
-    def test_signup_for_nonexistent_activity(self, client):
-        """Test signup for an activity that doesn't exist."""
-        response = client.post(
-            "/activities/Nonexistent Club/signup",
-            params={"email": "student@mergington.edu"}
-        )
-        assert response.status_code == 404
-        assert response.json()["detail"] == "Activity not found"
+        assert "newstudent@mergington.edu" in state["Chess Club"]["participants"]
     
-    def test_signup_duplicate_email(self, client):
+    def test_signup_duplicate_email(self, client, rjson):
         """Test that signing up twice with the same email fails."""
         email = "duplicate@mergington.edu"
         
@@ -90,32 +86,28 @@ class TestSignupEndpoint:
             params={"email": email}
         )
         assert response2.status_code == 400
-        assert response2.json()["detail"] == "Student already signed up for this activity"
+        assert rjson(response2)["detail"] == "Student already signed up for this activity"
     
-    def test_signup_when_activity_full(self, client):
-        """Test that signup fails when activity is at max capacity."""
+    def test_signup_when_activity_full(self, signup_handler, state):
+        """Test that the signup handler rejects students once an activity is at max capacity."""
         # Chess Club has max_participants of 12 and currently has 2 participants
         # Fill it up to max capacity
         for i in range(10):
-            response = client.post(
-                "/activities/Chess Club/signup",
-                params={"email": f"student{i}@mergington.edu"}
-            )
-            assert response.status_code == 200
+            email = f"student{i}@mergington.edu"
+            result = signup_handler(activity_name="Chess Club", email=email)
+            assert result == {"message": f"Signed up {email} for Chess Club"}
+        assert len(state["Chess Club"]["participants"]) == 12
         
         # Try to add one more (should fail)
-        response = client.post(
-            "/activities/Chess Club/signup",
-            params={"email": "overflow@mergington.edu"}
-        )
-        assert response.status_code == 400
-        assert response.json()["detail"] == "Activity is full"
+        with pytest.raises(HTTPException) as exc_info:
+            signup_handler(activity_name="Chess Club", email="overflow@mergington.edu")
+        assert exc_info.value.status_code == 400
+        assert exc_info.value.detail == "Activity is full"
     
-    def test_signup_preserves_existing_participants(self, client):
+    def test_signup_preserves_existing_participants(self, client, rjson, pristine_activities):
         """Test that signing up doesn't remove existing participants."""
         # Get initial participants
-        activities_before = client.get("/activities").json()
-        initial_participants = activities_before["Programming Class"]["participants"].copy()
+        initial_participants = pristine_activities["Programming Class"]["participants"]
         
         # Add a new student
         response = client.post(
@@ -125,19 +117,48 @@ class TestSignupEndpoint:
         assert response.status_code == 200
         
         # Verify all previous participants are still there
-        activities_after = client.get("/activities").json()
+        activities_after = rjson(client.get("/activities"))
         current_participants = activities_after["Programming Class"]["participants"]
         
-        for participant in initial_participants:
-            assert participant in current_participants
+        assert set(initial_participants).issubset(current_participants)
         
         assert "newstudent@mergington.edu" in current_participants
 
 
+class TestBatchSignupEndpoint:
+    """Tests for the POST /activities/{activity_name}/signup:batch endpoint."""
+    
+    def test_batch_signup_reports_partial_failures(self, client, rjson):
+        """Test that batch signup adds valid emails and reports the rest."""
+        # Debate Team has max_participants of 16 and currently has 2 participants
+        emails = ["ethan@mergington.edu"] + [f"debater{i}@mergington.edu" for i in range(15)]
+        response = client.post(
+            "/activities/Debate Team/signup:batch",
+            json={"emails": emails}
+        )
+        assert response.status_code == 200
+        
+        data = rjson(response)
+        assert data["succeeded"] == [f"debater{i}@mergington.edu" for i in range(14)]
+        assert data["failed"] == [
+            {"email": "ethan@mergington.edu", "reason": "Student already signed up for this activity"},
+            {"email": "debater14@mergington.edu", "reason": "Activity is full"},
+        ]
+    
+    def test_batch_signup_for_nonexistent_activity(self, client, rjson):
+        """Test batch signup for an activity that doesn't exist."""
+        response = client.post(
+            "/activities/Nonexistent Club/signup:batch",
+            json={"emails": ["student@mergington.edu"]}
+        )
+        assert response.status_code == 404
+        assert rjson(response)["detail"] == "Activity not found"
+
+
 class TestUnregisterEndpoint:
     """Tests for the DELETE /activities/{activity_name}/unregister endpoint."""
     
-    def test_unregister_success(self, client):
+    def test_unregister_success(self, client, state, rjson):
         """Test successful unregistration from an activity."""
         # First, signup a student
         signup_response = client.post(
@@ -152,31 +173,12 @@ class TestUnregisterEndpoint:
             params={"email": "temporary@mergington.edu"}
         )
         assert response.status_code == 200
-        assert response.json()["message"] == "Unregistered temporary@mergington.edu from Basketball Team"
+        assert rjson(response)["message"] == "Unregistered temporary@mergington.edu from Basketball Team"
         
         # Verify the student was removed
-        activities = client.get("/activities").json()
-        assert "temporary@mergington.edu" not in activities["Basketball Team"]["participants"]
-    
-    def test_unregister_from_nonexistent_activity(self, client):
-        """Test unregistration from an activity that doesn't exist."""
-        response = client.delete(
-            "/activities/Nonexistent Club/unregister",
-            params={"email": "student@mergington.edu"}
-        )
-        assert response.status_code == 404
-        assert response.json()["detail"] == "Activity not found"
-    
-    def test_unregister_when_not_registered(self, client):
-        """Test unregistration when student is not registered."""
-        response = client.delete(
-            "/activities/Drama Club/unregister",
-            params={"email": "notregistered@mergington.edu"}
-        )
-        assert response.status_code == 400
-        assert response.json()["detail"] == "Student not registered for this activity"
+        assert "temporary@mergington.edu" not in state["Basketball Team"]["participants"]
     
-    def test_unregister_existing_participant(self, client):
+    def test_unregister_existing_participant(self, client, state):
         """Test unregistering an existing participant."""
         # Unregister michael who is already in Chess Club
         response = client.delete(
@@ -186,13 +188,12 @@ class TestUnregisterEndpoint:
         assert response.status_code == 200
         
         # Verify michael was removed
-        activities = client.get("/activities").json()
-        assert "michael@mergington.edu" not in activities["Chess Club"]["participants"]
+        assert "michael@mergington.edu" not in state["Chess Club"]["participants"]
         
         # Verify daniel is still there
-        assert "daniel@mergington.edu" in activities["Chess Club"]["participants"]
+        assert "daniel@mergington.edu" in state["Chess Club"]["participants"]
     
-    def test_signup_after_unregister(self, client):
+    def test_signup_after_unregister(self, client, state):
         """Test that a student can sign up again after unregistering."""
         email = "rejoining@mergington.edu"
         
@@ -218,14 +219,42 @@ class TestUnregisterEndpoint:
         assert response3.status_code == 200
         
         # Verify the student is in the list
-        activities = client.get("/activities").json()
-        assert email in activities["Swimming Club"]["participants"]
+        assert email in state["Swimming Club"]["participants"]
+
+
+class TestErrorPaths:
+    """Tests for error responses shared by the signup and unregister endpoints."""
+    
+    @pytest.mark.parametrize(
+        "method, url, params, expected_status, expected_detail",
+        [
+            ("post", "/activities/Nonexistent Club/signup",
+             {"email": "student@mergington.edu"}, 404, "Activity not found"),
+            ("post", "/activities/Chess Club/signup",
+             {"email": "michael@mergington.edu"}, 400, "Student already signed up for this activity"),
+            ("delete", "/activities/Nonexistent Club/unregister",
+             {"email": "student@mergington.edu"}, 404, "Activity not found"),
+            ("delete", "/activities/Drama Club/unregister",
+             {"email": "notregistered@mergington.edu"}, 400, "Student not registered for this activity"),
+        ],
+        ids=[
+            "signup-nonexistent-activity",
+            "signup-already-registered",
+            "unregister-nonexistent-activity",
+            "unregister-not-registered",
+        ],
+    )
+    def test_error_paths(self, client, method, url, params, expected_status, expected_detail, rjson):
+        """Test that invalid requests return the expected status and detail."""
+        response = getattr(client, method)(url, params=params)
+        assert response.status_code == expected_status
+        assert rjson(response)["detail"] == expected_detail
 
 
 class TestIntegration:
     """Integration tests for complex workflows."""
     
-    def test_multiple_signups_for_same_student(self, client):
+    def test_multiple_signups_for_same_student(self, client, state):
         """Test that a student can sign up for multiple activities."""
         email = "multitasker@mergington.edu"
         
@@ -240,32 +269,28 @@ class TestIntegration:
             assert response.status_code == 200
         
         # Verify the student is in all activities
-        all_activities = client.get("/activities").json()
-        
         for activity in activities_to_join:
-            assert email in all_activities[activity]["participants"]
+            assert email in state[activity]["participants"]
     
-    def test_activity_capacity_management(self, client):
+    def test_activity_capacity_management(self, client, state, rjson, pristine_activities):
         """Test that activity capacity is properly managed."""
         # Get Gym Class which has max 30 participants and currently has 2
-        activities = client.get("/activities").json()
-        gym_class = activities["Gym Class"]
+        gym_class = pristine_activities["Gym Class"]
         
         initial_count = len(gym_class["participants"])
         max_participants = gym_class["max_participants"]
         spots_available = max_participants - initial_count
         
         # Fill up the remaining spots
-        for i in range(spots_available):
-            response = client.post(
-                "/activities/Gym Class/signup",
-                params={"email": f"gymstudent{i}@mergington.edu"}
-            )
-            assert response.status_code == 200
+        response = client.post(
+            "/activities/Gym Class/signup:batch",
+            json={"emails": [f"gymstudent{i}@mergington.edu" for i in range(spots_available)]}
+        )
+        assert response.status_code == 200
+        assert len(rjson(response)["succeeded"]) == spots_available
         
         # Verify it's full
-        activities = client.get("/activities").json()
-        assert len(activities["Gym Class"]["participants"]) == max_participants
+        assert len(state["Gym Class"]["participants"]) == max_participants
         
         # Try to add one more (should fail)
         response = client.post(
@@ -273,3 +298,52 @@ class TestIntegration:
             params={"email": "overflow@mergington.edu"}
         )
         assert response.status_code == 400
+        assert rjson(response)["detail"] == "Activity is full"
+    
+    @pytest.mark.anyio
+    async def test_concurrent_signups_fill_activity(self, async_client, state):
+        """Test that concurrent signups fill an activity and reject the rest.
+
+        This only checks that gathered requests go through; the race on the
+        capacity check is covered by test_racing_signups_do_not_exceed_capacity.
+        """
+        # Chess Club has max_participants of 12 and currently has 2 participants
+        responses = await asyncio.gather(*[
+            async_client.post(
+                "/activities/Chess Club/signup",
+                params={"email": f"student{i}@mergington.edu"}
+            )
+            for i in range(15)
+        ])
+        
+        status_codes = [response.status_code for response in responses]
+        assert status_codes.count(200) == 10
+        assert status_codes.count(400) == 5
+        assert len(state["Chess Club"]["participants"]) == 12
+    
+    def test_racing_signups_do_not_exceed_capacity(self, signup_handler, state, monkeypatch):
+        """Test that signups racing on the capacity check never overfill an activity."""
+        class SlowCountSet(set):
+            """Set that pauses after counting, so other threads can pass the capacity check."""
+            
+            def __len__(self):
+                count = super().__len__()
+                time.sleep(0.001)
+                return count
+        
+        # Chess Club has max_participants of 12 and currently has 2 participants
+        chess_club = state["Chess Club"]
+        monkeypatch.setitem(chess_club, "participants", SlowCountSet(chess_club["participants"]))
+        
+        def signup(i):
+            try:
+                signup_handler(activity_name="Chess Club", email=f"student{i}@mergington.edu")
+                return True
+            except HTTPException:
+                return False
+        
+        with ThreadPoolExecutor(max_workers=12) as executor:
+            results = list(executor.map(signup, range(12)))
+        
+        assert results.count(True) == 10
+        assert set.__len__(chess_club["participants"]) == 12